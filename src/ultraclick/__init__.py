@@ -1,16 +1,18 @@
+import bisect
 import errno
 import inspect
 import json
 import logging
 import os
+import select
 import shlex
-import shutil
 import signal
 import subprocess
 import sys
-from functools import partial, wraps
+from functools import wraps
 from types import SimpleNamespace
 from urllib.parse import urlparse
+from weakref import WeakKeyDictionary
 
 # Explicit UltraClick overrides win over terminal heuristics.
 FORCE_COLORS = os.environ.get('ULTRACLICK_COLORS', '').lower() in {'1', 'true', 'yes', 'on'}
@@ -25,6 +27,11 @@ PLAIN_TEXT_MODE = not FORCE_COLORS and (
     or not sys.stderr.isatty()
 )
 
+# These imports stay eager on purpose: rich_click defines the base classes
+# for RichCommand/RichGroup below and imports rich itself during its own
+# import, so deferring rich here would save nothing. The costly part —
+# constructing the console — is deferred instead (see _get_output at the
+# bottom of this module).
 import rich
 import rich.console
 import rich.panel
@@ -67,6 +74,8 @@ class PlainTextConsole:
     It accepts the `Console.print()` parameters used in this file and writes plain text.
     """
 
+    __slots__ = ('file',)
+
     def __init__(self, file):
         self.file = file
 
@@ -82,22 +91,29 @@ class ClickContextProxy:
     without manually calling `click.get_current_context()` every time.
     """
 
+    # No instance state: every operation re-reads the live context, so a
+    # cached context could go stale between (or during nested) invocations.
+    __slots__ = ()
+
+    # Bound once so proxy operations skip the module attribute chain.
+    _get_current_context = staticmethod(click.get_current_context)
+
     def __getattr__(self, attr):
-        ctx = click.get_current_context()
+        ctx = self._get_current_context()
         return getattr(ctx, attr)
 
     def __getitem__(self, key):
-        ctx = click.get_current_context()
+        ctx = self._get_current_context()
         return ctx[key]
 
     # TODO: This method crashes because click.Context is not callable.
     #       Keeping it commented out for now to verify no downstream usage relies on it.
     # def __call__(self, *args, **kwargs):
-    #     ctx = click.get_current_context()
+    #     ctx = self._get_current_context()
     #     return ctx(*args, **kwargs)
 
     def __repr__(self):
-        ctx = click.get_current_context()
+        ctx = self._get_current_context()
         return repr(ctx)
 
 ctx = ClickContextProxy()
@@ -124,12 +140,15 @@ class UltraClickLogHandler(logging.Handler):
         # Logging must never turn a formatting/display issue into a command failure.
         try:
             message = self.format(record)
+            # The formatter is created lazily, so look it up instead of
+            # relying on the module global existing yet.
+            out = _get_output()
             if record.levelno >= logging.ERROR:
-                output.error(message)
+                out.error(message)
             elif record.levelno >= logging.WARNING:
-                output.warning(message)
+                out.warning(message)
             else:
-                output.info(message)
+                out.info(message)
         except Exception:
             self.handleError(record)
 
@@ -149,6 +168,23 @@ def configure_logging(capture_logs=True):
     # while informational library chatter stays hidden until a later verbosity option exists.
     root_logger.setLevel(logging.WARNING)
 
+def _echo_list(result):
+    if result:
+        click.echo("\n".join(map(str, result)))
+
+def _echo_dict(result):
+    lines = []
+    for key, value in result.items():
+        if isinstance(value, list):
+            value = ", ".join(map(str, value))
+        lines.append(f"{key}: {value}")
+    if lines:
+        click.echo("\n".join(lines))
+
+# Exact-type dispatch for the common result shapes; subclasses of list/dict
+# fall back to the isinstance chain in RichCommand.invoke.
+_RESULT_HANDLERS = {list: _echo_list, dict: _echo_dict}
+
 class RichCommand(click.RichCommand):
     """
     Custom Command class that automatically prints the return value of the command function.
@@ -162,25 +198,83 @@ class RichCommand(click.RichCommand):
         # Execute the original invoke method and capture the return value
         result = super().invoke(ctx)
 
-        if result is not None:
-            if isinstance(result, list):
-                for item in result:
-                    click.echo(item)
-            elif isinstance(result, dict):
-                for key, value in result.items():
-                    if isinstance(value, list):
-                        value = ", ".join(map(str, value))
-                    click.echo(f"{key}: {value}")
-            else:
-                click.echo(result)
+        # The common case: commands that print themselves and return nothing.
+        if result is None:
+            return result
+
+        # O(1) dispatch on the exact type; collections render in one echo
+        # call and empty collections print nothing, as before.
+        handler = _RESULT_HANDLERS.get(type(result))
+        if handler is not None:
+            handler(result)
+        elif isinstance(result, list):
+            _echo_list(result)
+        elif isinstance(result, dict):
+            _echo_dict(result)
+        else:
+            click.echo(result)
 
         return result
 
+# Classified discovery entries per source class: (attr_name, attr, kind)
+# triples with kind 'command' or 'class'. Walking the class dicts along the
+# MRO beats dir(), which returns dozens of inherited object dunders that
+# would each need a getattr plus two type checks. The cheap name tests run
+# before the isinstance checks, which must stay isinstance (not an exact-type
+# dispatch) so Command subclasses and arbitrary nested classes match.
+_class_scan_cache = {}
+
+def _scan_class(cls):
+    entries = _class_scan_cache.get(cls)
+    if entries is not None:
+        return entries
+
+    collected = []
+    seen = set()
+    for klass in cls.__mro__:
+        if klass is object:
+            continue
+        for attr_name, attr in vars(klass).items():
+            if attr_name in seen:
+                continue
+            seen.add(attr_name)
+            if attr_name.startswith('__'):
+                continue
+            if isinstance(attr, click.Command):
+                collected.append((attr_name, attr, 'command'))
+            elif not attr_name.startswith('_') and isinstance(attr, type):
+                collected.append((attr_name, attr, 'class'))
+
+    entries = tuple(collected)
+    _class_scan_cache[cls] = entries
+    return entries
+
 class RichGroup(click.RichGroup):
     source_class = None
     instance_key = None
     group_kwargs = None
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Resolved unique-prefix abbreviations (input -> full command name)
+        # and the sorted name list those prefixes are matched against.
+        self._abbrev_cache = {}
+        self._command_names = None
+        # The class instance of the current run, filled when the group
+        # instantiates its source class. Command wrappers read it directly
+        # instead of going through ctx.meta on every invocation.
+        self._instance = None
+        # Discovery runs once per group; repeat calls (parse_args re-triggers
+        # it after instantiation) would only re-scan the class and re-check
+        # every callback's wrap marker for nothing.
+        self._discovered = False
+
+    def add_command(self, cmd, name=None):
+        # A new command can make a previously unique prefix ambiguous.
+        self._abbrev_cache.clear()
+        self._command_names = None
+        super().add_command(cmd, name)
+
     def collect_usage_pieces(self, ctx):
         pieces = click.Command.collect_usage_pieces(self, ctx)
         if self.list_commands(ctx):
@@ -204,49 +298,58 @@ class RichGroup(click.RichGroup):
             # Instantiate the class with parsed options
             instance = self.source_class(**ctx.params)
             ctx.meta[self.instance_key] = instance
+            self._instance = instance
             self._discover()
             
         return rv
 
     def _discover(self):
         #output.info(f"RichGroup._discover(group={self.name}, source_class={self.source_class} context_settings={self.context_settings})")
-        if not self.source_class:
+        if not self.source_class or self._discovered:
             return
-
-        # Add commands dynamically
-        for attr_name in dir(self.source_class):
-            attr = getattr(self.source_class, attr_name)
-            if isinstance(attr, click.Command):
-                # Avoid redundant adding
-                cmd_name = getattr(attr, 'name', attr_name)
-                if cmd_name in self.commands:
-                    continue
-
-                # Wrap the command function with context
-                command_fn = attr.callback
-                #TODO: Is it an error if it's not callable?
-                if callable(command_fn):
-                    wrapped_callback = wrap_command_with_context(command_fn, instance_key=self.instance_key)
+        self._discovered = True
+
+        # The scan result is cached per class, so two groups built from the
+        # same class in one process classify its attributes only once.
+        for attr_name, attr, kind in _scan_class(self.source_class):
+            self._discover_attribute(attr_name, attr, kind)
+
+    def _discover_attribute(self, attr_name, attr, kind):
+        if kind == 'command':
+            # Avoid redundant adding
+            cmd_name = getattr(attr, 'name', attr_name)
+            if cmd_name in self.commands:
+                return
+
+            # Wrap the command function with context. A callback that already
+            # carries the wrapper (e.g. the command was discovered before, or
+            # is reachable both directly and through an alias) is left alone;
+            # wrapping it twice would inject `self` twice.
+            command_fn = attr.callback
+            #TODO: Is it an error if it's not callable?
+            if callable(command_fn) and not getattr(command_fn, '_ultraclick_wrapped', False):
+                # Only wrap callbacks that actually expect the group instance.
+                # A plain function command placed on the class has no `self`
+                # parameter and would break if one were injected.
+                original = getattr(command_fn, "__wrapped__", command_fn)
+                params = _get_signature(original).parameters
+                if next(iter(params), None) == 'self':
+                    wrapped_callback = wrap_command_with_context(command_fn, instance_key=self.instance_key, group=self)
                     attr.callback = wrapped_callback
 
-                #if attr_name != command_fn.__name__:
-                if attr.alias:
-                    #print('alias: ', attr, attr_name, getattr(attr, 'name', attr_name), command_fn.__name__)
-                    #alias_cmd = alias_command(attr_name, attr)
-                    self.add_command(attr, name=attr_name)
-                    continue
-                else:
-                    #print('add_command: ', attr, '1', attr_name, '2', getattr(attr, 'name', ''), '3', command_fn.__name__)
-                    # name parameter has priority, otherwise take the command function name
-                    self.add_command(attr, name=getattr(attr, 'name', attr_name))
-
-            # Handle nested groups
-            if isinstance(attr, type) and issubclass(attr, object) and not attr_name.startswith("_"):
-                # Nested group class
-                cmd_name = attr_name.lower()
-                if cmd_name not in self.commands:
-                    nested_group = group_from_class(attr, name=cmd_name, parent_key=self.instance_key, **(self.group_kwargs or {}))
-                    self.add_command(nested_group)
+            if attr.alias:
+                self.add_command(attr, name=attr_name)
+            else:
+                # name parameter has priority, otherwise take the command function name
+                self.add_command(attr, name=getattr(attr, 'name', attr_name))
+
+        # Handle nested groups
+        else:
+            # Nested group class
+            cmd_name = attr_name.lower()
+            if cmd_name not in self.commands:
+                nested_group = group_from_class(attr, name=cmd_name, parent_key=self.instance_key, **(self.group_kwargs or {}))
+                self.add_command(nested_group)
 
     def get_help_option(self, ctx):
         help_options = self.get_help_option_names(ctx)
@@ -272,15 +375,41 @@ class RichGroup(click.RichGroup):
         rv = click.Group.get_command(self, ctx, cmd_name)
         if rv is not None:
             return rv
-        matches = [x for x in self.list_commands(ctx)
-                   if x.startswith(cmd_name)]
+
+        # The memo stores the Command object itself; add_command clears it,
+        # so a hit can never hand back a stale command.
+        resolved = self._abbrev_cache.get(cmd_name)
+        if resolved is not None:
+            return resolved
+
+        names = self._command_names
+        if names is None:
+            names = self._command_names = self.list_commands(ctx)
+
+        # list_commands returns sorted names, so shared prefixes cluster:
+        # bisect jumps to the first candidate and the scan stops at the
+        # first name that no longer matches. The sort happens once per
+        # command-table change (the cache above), never per lookup miss —
+        # and only lookups that missed the exact table get this far.
+        matches = []
+        i = bisect.bisect_left(names, cmd_name)
+        while i < len(names) and names[i].startswith(cmd_name):
+            matches.append(names[i])
+            i += 1
         if not matches:
             return None
         elif len(matches) == 1:
-            return click.Group.get_command(self, ctx, matches[0])
+            # The match came straight out of list_commands, so grab it from
+            # the command table directly instead of a second get_command pass.
+            cmd = self.commands.get(matches[0])
+            if cmd is not None:
+                self._abbrev_cache[cmd_name] = cmd
+            return cmd
 
         click.echo(f'\n\n"{cmd_name}" is not unique: {", ".join(matches)}\n')
-        return super().get_command(ctx, cmd_name)
+        # The exact lookup already missed above, so re-dispatching through
+        # super() could only return None again.
+        return None
 
     def resolve_command(self, ctx, args):
         #output.info(f"resolve_command1 - args: {args} ctx.params={ctx.params}")
@@ -311,13 +440,17 @@ class RichGroup(click.RichGroup):
 
             raise exc
 
-def wrap_command_with_context(command_fn, instance_key=None):
+def wrap_command_with_context(command_fn, instance_key=None, group=None):
     """
     Wrap a command function to inject the corresponding group instance `self`
     into the first argument.
 
     Uses ClickContextProxy instead of passing ctx as a second parameter.
     """
+    # Unwrap Click's @pass_context wrapper once at wrap time to avoid
+    # injecting ctx twice; command_fn is fixed for the wrapper's lifetime.
+    actual_fn = getattr(command_fn, "__wrapped__", command_fn)
+
     @wraps(command_fn)
     @click.pass_context
     def wrapped_fn(ctx, *args, **kwargs):
@@ -326,14 +459,19 @@ def wrap_command_with_context(command_fn, instance_key=None):
             click.echo(ctx.get_help())
             ctx.exit()
 
-        instance = ctx.meta.get(instance_key)
+        # The owning group records its instance when it creates it; fall back
+        # to ctx.meta for flows that seed the context themselves.
+        instance = group._instance if group is not None else None
+        if instance is None:
+            instance = ctx.meta.get(instance_key)
         if not instance:
             raise ValueError(f"Instance for key '{instance_key}' not found in context.")
 
-        # Unwrap Click's @pass_context wrapper to avoid injecting ctx twice
-        actual_fn = getattr(command_fn, "__wrapped__", command_fn)
         return actual_fn(instance, *args, **kwargs)
 
+    # Marker so discovery can recognize an already-wrapped callback.
+    wrapped_fn._ultraclick_wrapped = True
+
     return wrapped_fn
 
 def alias_command(alias_name, target_command, alias_help=None):
@@ -370,10 +508,22 @@ def main_group(*args, **kwargs):
         return group_from_class(cls, *args, **kwargs)
     return decorator
 
+# Built groups keyed by (cls, name, parent_key). Re-entrant invocations
+# (tests, REPLs, shell completion re-running the CLI in-process) rebuild
+# identical groups from the same class, so return the finished group instead
+# of repeating the attribute scan and callback wrapping every time.
+# The remaining build options stay out of the key on purpose: capture_logs is
+# stable per process, and keying on id(initial_ctx_meta) would alias two
+# different dicts as soon as one is collected and its id reused.
+_group_cache = {}
+
 def group_from_class(cls, name=None, help=None, parent_key=None, initial_ctx_meta=None, capture_logs=True, **kwargs):
     """
     Dynamically create a Click command group from a class.
 
+    Repeated calls with the same class, name, and parent_key return the
+    already-built group from a module-level cache.
+
     Args:
         cls: The class to convert into a Click group
         name: The name of the command (defaults to lowercase class name)
@@ -384,6 +534,12 @@ def group_from_class(cls, name=None, help=None, parent_key=None, initial_ctx_met
     """
     if name is None:
         name = cls.__name__.lower()
+
+    cache_key = (cls, name, parent_key)
+    cached = _group_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     if help is None:
         help = inspect.getdoc(cls) or ""
 
@@ -410,15 +566,17 @@ def group_from_class(cls, name=None, help=None, parent_key=None, initial_ctx_met
         if instance_key in ctx.meta:
             instance = ctx.meta[instance_key]
         else:
-            if not ctx.meta and initial_ctx_meta:
-                ctx.meta.update(initial_ctx_meta)
-
-            # Set a flag in the context that we'll use to decide whether to show help
-            ctx.meta['show_help_on_no_command'] = True
-
-            # Instantiate the class and store it in the context using the instance key
+            # Seed the context metadata in one update: the initial values (on a
+            # fresh context) plus the flag that decides whether to show help.
+            seed = dict(initial_ctx_meta) if (not ctx.meta and initial_ctx_meta) else {}
+            seed['show_help_on_no_command'] = True
+            ctx.meta.update(seed)
+
+            # Instantiate the class afterwards because __init__ may read ctx.meta,
+            # and store the instance in the context using the instance key
             instance = cls(*args, **kwargs)
             ctx.meta[instance_key] = instance
+            group_cmd._instance = instance
 
         # Handle execution if no subcommand was invoked
         if ctx.invoked_subcommand is None:
@@ -436,8 +594,59 @@ def group_from_class(cls, name=None, help=None, parent_key=None, initial_ctx_met
     # Perform initial discovery
     group_cmd._discover()
 
+    # Cache only the fully built group so a cache hit never observes a group
+    # that is still being mutated by add_command during discovery.
+    _group_cache[cache_key] = group_cmd
+
     return group_cmd
 
+# Static environment overrides plain mode applies to every child process.
+_PLAIN_CHILD_ENV = {'TERM': 'dumb', 'NO_COLOR': '1', 'CLICOLOR': '0'}
+
+# One PTY read drains up to this much; large enough that fast producers cost
+# a handful of syscalls per megabyte instead of one per kilobyte.
+_PTY_READ_SIZE = 65536
+
+class _NullConsole:
+    """
+    Console stand-in used while silence() is active: print() does nothing,
+    so suppressed output pays no formatting work at all.
+    """
+
+    __slots__ = ()
+
+    def print(self, *objects, **kwargs):
+        pass
+
+_NULL_CONSOLE = _NullConsole()
+
+class _SilenceContext:
+    """
+    Context manager behind OutputFormatter.silence(). Defined once at module
+    level instead of being rebuilt as a local class on every silence() call.
+    """
+
+    __slots__ = ('formatter',)
+
+    def __init__(self, formatter):
+        self.formatter = formatter
+
+    def __enter__(self):
+        formatter = self.formatter
+        if not formatter._silenced:
+            formatter._silenced = True
+            # Swap the whole console for the no-op one: a pointer exchange
+            # with no file handles involved, and the rich rendering pipeline
+            # is skipped while silenced instead of writing to /dev/null.
+            formatter.console = _NULL_CONSOLE
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        formatter = self.formatter
+        if formatter._silenced:
+            formatter._silenced = False
+            formatter.console = formatter._original_console
+
+
 class OutputFormatter:
     """
     Handles all output formatting.
@@ -446,26 +655,44 @@ class OutputFormatter:
     - Consistent naming for methods: title, main_operation, environment, headline, command, error, failure, success, info, prompt.
     """
 
-    lines = 25
-    columns = 80
+    _lines = None
+    _columns = None
 
     def __init__(self):
-        # Rich console should pick up those env variables
-        if 'LINES' in os.environ:
-            self.lines = int(os.environ["LINES"])
-        else:
-            self.lines = shutil.get_terminal_size().lines
-
-        if 'COLUMNS' in os.environ:
-            self.columns = int(os.environ["COLUMNS"])
-        else:
-            self.columns = shutil.get_terminal_size().columns
-
         self.console = rich.console.Console(highlight=False, file=sys.stderr)
-        self._original_console_file = self.console.file
+        self._original_console = self.console
         self._silenced = False
         self.shell = self._find_shell()
 
+    # Terminal geometry is only needed when shelling out, so probe it lazily
+    # on first access and keep the result. Most invocations just echo a
+    # command's return value and never pay for the lookup.
+    @property
+    def lines(self):
+        if self._lines is None:
+            if 'LINES' in os.environ:
+                self._lines = int(os.environ["LINES"])
+            else:
+                # Direct ioctl; shutil.get_terminal_size would re-check the
+                # env vars handled above before ending up here anyway.
+                try:
+                    self._lines = os.get_terminal_size().lines
+                except OSError:
+                    self._lines = 25
+        return self._lines
+
+    @property
+    def columns(self):
+        if self._columns is None:
+            if 'COLUMNS' in os.environ:
+                self._columns = int(os.environ["COLUMNS"])
+            else:
+                try:
+                    self._columns = os.get_terminal_size().columns
+                except OSError:
+                    self._columns = 80
+        return self._columns
+
     def _find_shell(self):
         """Find a suitable shell, preferring bash over sh for better proctitle support."""
         if os.name == 'nt':
@@ -528,22 +755,31 @@ class OutputFormatter:
         """
         Context manager to temporarily silence the console output.
         """
-        class SilenceContext:
-            def __init__(inner_self, formatter):
-                inner_self.formatter = formatter
-
-            def __enter__(inner_self):
-                if not self._silenced:
-                    self._silenced = True
-                    self.console.file = open(os.devnull, "w")
-
-            def __exit__(inner_self, exc_type, exc_value, traceback):
-                if self._silenced:
-                    self._silenced = False
-                    self.console.file.close()
-                    self.console.file = self._original_console_file
+        return _SilenceContext(self)
 
-        return SilenceContext(self)
+    def _command_env(self):
+        """
+        Build the environment for child processes: current os.environ plus the
+        terminal geometry and, in plain mode, the plain-terminal expectations.
+
+        Built fresh per call on purpose. Caching the dict was tried and
+        reverted: no cheap guard detects in-place value edits or balanced
+        add/remove of environment variables, so a command that updates
+        os.environ before shelling out would hand the child stale values.
+        Detecting that reliably means comparing every entry, which costs the
+        same as the copy — and the copy is noise next to the fork/exec each
+        run_command already pays.
+        """
+        env = os.environ.copy()
+        env['LINES'] = str(self.lines)
+        env['COLUMNS'] = str(self.columns)
+        if PLAIN_TEXT_MODE:
+            # Plain mode should propagate the same terminal expectations to child processes.
+            env.update(_PLAIN_CHILD_ENV)
+            env.pop('CLICOLOR_FORCE', None)
+        #env["FORCE_COLOR"] = "1"  # Enable forced color output for commands that respect it
+        #env["COMPOSE_PROGRESS"] = "plain"
+        return env
 
     def run_command(self, command, headline=None, suppress=False, error_handling=True, parse_json=False, silent=False):
         """
@@ -553,8 +789,12 @@ class OutputFormatter:
         """
         # Accept argv-style input so callers can describe command boundaries directly and let
         # UltraClick assemble the shell string in one place before handing it to the PTY runner.
+        # argv input additionally skips the shell on the capture path below: there is nothing
+        # for a shell to parse, so the process is exec'd directly.
+        argv = None
         if isinstance(command, (list, tuple)):
-            command = shlex.join([str(part) for part in command])
+            argv = [str(part) for part in command]
+            command = shlex.join(argv)
 
         # Keep string input working exactly as before so existing callers can continue passing
         # prebuilt shell commands without any behavior change.
@@ -570,23 +810,23 @@ class OutputFormatter:
             error_handling = False
 
         # Prepare the environment with color support
-        env = os.environ.copy()
-        env['LINES'] = str(self.lines)
-        env['COLUMNS'] = str(self.columns)
-        if PLAIN_TEXT_MODE:
-            # Plain mode should propagate the same terminal expectations to child processes.
-            env['TERM'] = 'dumb'
-            env['NO_COLOR'] = '1'
-            env['CLICOLOR'] = '0'
-            env.pop('CLICOLOR_FORCE', None)
-        #env["FORCE_COLOR"] = "1"  # Enable forced color output for commands that respect it
-        #env["COMPOSE_PROGRESS"] = "plain"
+        env = self._command_env()
 
         # JSON parsing requires unmixed streams: a PTY merges stderr into stdout, so any
         # subprocess warning on stderr (Node DEP0169, Python DeprecationWarning, etc.)
         # would corrupt json.loads. Always use the non-PTY path when parse_json is requested.
         if parse_json or PLAIN_TEXT_MODE or os.name == 'nt':
-            result = subprocess.run(command, shell=True, executable=self.shell, text=True, capture_output=True, env=env)
+            if argv is not None:
+                # Direct exec saves the shell fork; shell strings keep going
+                # through the configured shell so bash features still work.
+                try:
+                    result = subprocess.run(argv, text=True, capture_output=True, env=env)
+                except OSError as e:
+                    # Keep the shell's contract for an unrunnable executable
+                    # instead of leaking the OSError to the caller.
+                    result = subprocess.CompletedProcess(argv, 127, stdout="", stderr=f"{argv[0]}: {e.strerror}\n")
+            else:
+                result = subprocess.run(command, shell=True, executable=self.shell, text=True, capture_output=True, env=env)
             if not suppress:
                 print(result.stdout, end="")
                 print(result.stderr, end="", file=sys.stderr)
@@ -613,7 +853,9 @@ class OutputFormatter:
             )
 
         # Use PTY on Unix systems
-        stdout_bytes = bytearray()
+        # Collected chunks are joined once at the end; bytes.join preallocates
+        # the exact size instead of growing a bytearray chunk by chunk.
+        chunks = []
 
         try:
             # Open a pseudo-terminal
@@ -643,26 +885,43 @@ class OutputFormatter:
 
             signal.signal(signal.SIGINT, forward_signal)
 
-            decoder = codecs.getincrementaldecoder("utf-8")()
-            buffer = bytearray()
-
-            # Read from the master PTY in real-time
+            # Read from the master PTY in real-time. The fd is non-blocking so
+            # the loop sleeps in select until data is ready and then drains
+            # whatever accumulated in one read. Streamed chunks go to the
+            # stdout byte buffer as-is: PTY output is already terminal-ready
+            # bytes, so a decode->encode round trip per chunk buys nothing —
+            # the terminal reassembles multibyte sequences split across reads.
+            os.set_blocking(master_fd, False)
+            # A replaced text-only stdout (io.StringIO and friends) has no
+            # byte buffer; fall back to decoded writes there. That branch
+            # needs the incremental decoder: a read can end mid-character,
+            # and decoding chunks independently would emit U+FFFD.
+            stream = getattr(sys.stdout, 'buffer', None) if not suppress else None
+            text_stream = decoder = None
+            if not suppress and stream is None:
+                text_stream = sys.stdout
+                decoder = codecs.getincrementaldecoder("utf-8")("replace")
             try:
                 while True:
-                    chunk = os.read(master_fd, 1024)  # Read up to 1024 bytes
+                    select.select([master_fd], [], [])
+                    try:
+                        chunk = os.read(master_fd, _PTY_READ_SIZE)
+                    except BlockingIOError:
+                        continue
                     if not chunk:
                         break
-                    stdout_bytes.extend(chunk)
-                    text = decoder.decode(chunk)
-                    if not suppress:
-                        print(text, end="")
-                        #print(chunk.decode("utf-8", errors="replace"), end="")  # Decode and print
+                    chunks.append(chunk)
+                    if stream is not None:
+                        stream.write(chunk)
+                        stream.flush()
+                    elif text_stream is not None:
+                        text_stream.write(decoder.decode(chunk))
             except OSError as e:
                 if e.errno != errno.EIO:  # EIO means EOF
                     raise
             finally:
-                if not suppress:
-                    print(decoder.decode(b"", final=True), end="")
+                if text_stream is not None:
+                    text_stream.write(decoder.decode(b"", final=True))
                 os.close(master_fd)  # Ensure the fd is closed
 
             # Wait for the process to complete
@@ -678,7 +937,7 @@ class OutputFormatter:
             # Return result as a simple namespace for compatibility
             return SimpleNamespace(
                 returncode=process.returncode,
-                stdout=stdout_bytes.decode("utf-8", errors="replace"),  # Decode captured output
+                stdout=b"".join(chunks).decode("utf-8", errors="replace"),  # Decode captured output
                 stderr=""  # stderr is combined with stdout in PTY
             )
 
@@ -702,19 +961,9 @@ class PlainOutputFormatter(OutputFormatter):
     """
 
     def __init__(self):
-        if 'LINES' in os.environ:
-            self.lines = int(os.environ["LINES"])
-        else:
-            self.lines = shutil.get_terminal_size().lines
-
-        if 'COLUMNS' in os.environ:
-            self.columns = int(os.environ["COLUMNS"])
-        else:
-            self.columns = shutil.get_terminal_size().columns
-
         # Plain mode must not touch Rich imports, so it initializes its own console directly.
         self.console = PlainTextConsole(sys.stderr)
-        self._original_console_file = self.console.file
+        self._original_console = self.console
         self._silenced = False
         self.shell = self._find_shell()
 
@@ -747,7 +996,30 @@ class PlainOutputFormatter(OutputFormatter):
 
 
 
-@wraps(click.option)
+# "No default in the signature" sentinel, resolved once instead of through
+# two attribute lookups on every decorator application.
+_EMPTY = inspect.Parameter.empty
+
+# Prebuilt table mapping option/argument declarations to Python parameter
+# names; str.translate over a ready table beats a str.replace per decorator.
+_DASH_TO_UNDERSCORE = str.maketrans('-', '_')
+
+# Weak keys so the cache never keeps otherwise-unreferenced functions alive.
+_signature_cache = WeakKeyDictionary()
+
+def _get_signature(func):
+    """
+    Cached `inspect.signature` lookup.
+
+    Stacked decorators (several @option/@argument on one function) would
+    otherwise rebuild the same Signature object once per decorator.
+    """
+    sig = _signature_cache.get(func)
+    if sig is None:
+        sig = inspect.signature(func)
+        _signature_cache[func] = sig
+    return sig
+
 def option(*param_decls, **kwargs):
     """
     A drop-in replacement for `click.option` that injects default values from the
@@ -761,13 +1033,13 @@ def option(*param_decls, **kwargs):
         if "default" in kwargs and "show_default" not in kwargs:
             kwargs["show_default"] = True
 
-        # Retrieve the function's signature
-        sig = inspect.signature(func)
-        param_name = param_decls[0].lstrip('-').replace('-', '_')  # Normalize parameter name
+        # Retrieve the function's signature (cached per function object)
+        sig = _get_signature(func)
+        param_name = param_decls[0].lstrip('-').translate(_DASH_TO_UNDERSCORE)  # Normalize parameter name
 
         # Find the parameter in the signature and check for a default
         param = sig.parameters.get(param_name)
-        if param and param.default != inspect.Parameter.empty and "default" not in kwargs:
+        if param and param.default is not _EMPTY and "default" not in kwargs:
             kwargs["default"] = param.default
             if "show_default" not in kwargs:
                 kwargs["show_default"] = True
@@ -777,7 +1049,6 @@ def option(*param_decls, **kwargs):
 
     return decorator
 
-@wraps(click.argument)
 def argument(*param_decls, **kwargs):
     """
     A drop-in replacement for `click.argument` that injects default values
@@ -786,11 +1057,11 @@ def argument(*param_decls, **kwargs):
     if you want an argument to accept an optional value.
     """
     def decorator(func):
-        sig = inspect.signature(func)
-        param_name = param_decls[0].lstrip('-').replace('-', '_')
+        sig = _get_signature(func)
+        param_name = param_decls[0].lstrip('-').translate(_DASH_TO_UNDERSCORE)
 
         param = sig.parameters.get(param_name)
-        if param and param.default != inspect.Parameter.empty:
+        if param and param.default is not _EMPTY:
             # Only set default if the user didn't already specify it
             if "default" not in kwargs:
                 kwargs["default"] = param.default
@@ -803,8 +1074,33 @@ def argument(*param_decls, **kwargs):
 
     return decorator
 
-command = partial(click.command, cls=RichCommand)
-output = PlainOutputFormatter() if PLAIN_TEXT_MODE else OutputFormatter()
+def command(*args, **kwargs):
+    """
+    A drop-in replacement for `click.command` that builds RichCommand
+    instances by default. A plain function instead of a partial so the
+    name, docstring, and signature introspect like a regular decorator.
+    """
+    kwargs.setdefault('cls', RichCommand)
+    return click.command(*args, **kwargs)
+
+_output = None
 
-# Short alias
-run = output.run_command_and_print_output
+def _get_output():
+    """
+    Build the output formatter on first use.
+
+    Constructing the formatter sets up a console and resolves a shell, so
+    `import ultraclick` should not pay for it (PEP 562 lazy attribute below).
+    """
+    global _output
+    if _output is None:
+        _output = PlainOutputFormatter() if PLAIN_TEXT_MODE else OutputFormatter()
+    return _output
+
+def __getattr__(name):
+    # `output` and its short `run` alias are created lazily on first access.
+    if name == 'output':
+        return _get_output()
+    if name == 'run':
+        return _get_output().run_command_and_print_output
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,110 @@
+"""In-process demo CLI tests via Click's CliRunner.
+
+These mirror the stdout-facing behaviors of tests/test_demo.py without one
+interpreter cold-start per test. The subprocess tests stay authoritative for
+everything decided at import time (plain/color mode, TERM handling) and for
+formatter output on the real stderr, which CliRunner cannot capture because
+the console binds its stream when the formatter is first built.
+"""
+
+import os
+import sys
+import unittest
+
+from click.testing import CliRunner
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+import ultraclick
+
+# Build the formatter against the real stderr before any invoke swaps the
+# streams; see the module docstring.
+ultraclick.output
+
+from demo import MainApp
+
+
+class TestDemoCliRunner(unittest.TestCase):
+    def setUp(self):
+        self.runner = CliRunner()
+
+    def invoke(self, args):
+        return self.runner.invoke(MainApp, args)
+
+    def test_version_option(self):
+        result = self.invoke(["--version"])
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn("version", result.output.lower())
+
+    def test_status_command(self):
+        result = self.invoke(["status"])
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn("Status: Running", result.output)
+        self.assertIn("Environment: development", result.output)
+        self.assertIn("Profile: default", result.output)
+
+    def test_config_show_command(self):
+        result = self.invoke(["config", "show"])
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn("Active Profile: default", result.output)
+        self.assertIn("Config Directory: ./config", result.output)
+
+    def test_config_set_command(self):
+        result = self.invoke(["config", "set", "debug", "true"])
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn("Setting debug=true in profile 'default'", result.output)
+
+    def test_config_alias_command(self):
+        result = self.invoke(["config", "update", "debug", "false"])
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn("Setting debug=false in profile 'default'", result.output)
+
+    def test_resource_list_command(self):
+        result = self.invoke(["resource", "list"])
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn("Listing all servers (Profile: default)", result.output)
+
+    def test_resource_create_command(self):
+        result = self.invoke(["resource", "--resource-type", "database", "create",
+                              "mydb", "--size", "large", "--region", "eu-west"])
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn("Creating database 'mydb'", result.output)
+        self.assertIn("Size: large", result.output)
+        self.assertIn("Region: eu-west", result.output)
+
+    def test_command_abbreviation(self):
+        result = self.invoke(["r", "l"])
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn("Listing all servers (Profile: default)", result.output)
+
+    def test_global_options(self):
+        result = self.invoke(["--profile", "production", "status"])
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn("Profile: production", result.output)
+
+    def test_allow_interspersed_args(self):
+        result = self.invoke(["status", "--verbose"])
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn("Verbose: True", result.output)
+
+    def test_repeated_invocations_get_fresh_state(self):
+        # Two invocations in one process must not leak instance state.
+        first = self.invoke(["--profile", "production", "status"])
+        second = self.invoke(["status"])
+        self.assertIn("Profile: production", first.output)
+        self.assertIn("Profile: default", second.output)
+
+    def test_leaf_command_help(self):
+        result = self.invoke(["status", "--help"])
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn("Usage:", result.output)
+        self.assertNotIn("Status: Running", result.output)
+
+    def test_unknown_command_fails(self):
+        result = self.invoke(["zzz"])
+        self.assertNotEqual(result.exit_code, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()